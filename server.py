@@ -2,36 +2,83 @@
 Week 4 Lab: World Bank Data MCP Server
 
 An MCP server that exposes:
-- Resources: Local World Bank indicator data from CSV
+- Resources: Local World Bank indicator data (CSV, converted to Parquet on first use)
 - Tools: Live data from REST Countries and World Bank APIs
 
 Transport: Streamable HTTP on port 8765
 """
-import json
+import asyncio
+import contextlib
+import functools
 import logging
+import random
+import re
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, TypeVar, cast
 
 import httpx
+import orjson
 import polars as pl
+import uvicorn
 from mcp.server.fastmcp import FastMCP
+from starlette.applications import Starlette
 
 
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
 
-DATA_FILE: Path = Path(__file__).parent / "data" / "world_bank_indicators.csv"
+CSV_FILE: Path = Path(__file__).parent / "data" / "world_bank_indicators.csv"
+DATA_FILE: Path = CSV_FILE.with_suffix(".parquet")
+INDICATOR_COLUMNS: list[str] = ["indicator_id", "indicator_name", "year", "value"]
 HOST: str = "127.0.0.1"
 PORT: int = 8765
+HTTP_TIMEOUT: float = 30.0
+HTTP_MAX_KEEPALIVE: int = 64
+HTTP_MAX_CONNECTIONS: int = 128
+COMPARE_CONCURRENCY: int = 8
+HTTP_MAX_ATTEMPTS: int = 5
+HTTP_BACKOFF_CAP: float = 30.0
+HTTP_RETRY_BUDGET: float = 45.0
+HTTP_RETRY_STATUSES: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+HOST_RATE_PER_SECOND: float = 10.0
+HOST_RATE_BURST: int = 10
+CACHE_TTL_SECONDS: float = 3600.0
+CACHE_STALE_SECONDS: float = 600.0
+CACHE_MAX_ENTRIES: int = 4096
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s,p%(process)s,{%(filename)s:%(lineno)d},%(levelname)s,%(message)s",
+    datefmt="%H:%M:%S",
 )
+# Skip per-record thread and multiprocessing lookups the format never uses
+logging.logThreads = False
+logging.logMultiprocessing = False
 logger = logging.getLogger(__name__)
 
+# Shared HTTP/2 client so concurrent tool calls multiplex over pooled connections
+CLIENT = httpx.AsyncClient(
+    http2=True,
+    timeout=HTTP_TIMEOUT,
+    limits=httpx.Limits(
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        max_connections=HTTP_MAX_CONNECTIONS,
+    ),
+)
+
+# ISO 3166-1 alpha-2 or alpha-3, after uppercasing
+_CODE_RE = re.compile(r"^[A-Z]{2,3}$")
+
+# API response cache: key -> (stored_at, value), plus in-flight fetches per key
+T = TypeVar("T")
+_CACHE: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+_INFLIGHT: dict[tuple, asyncio.Task] = {}
+
 # Initialize MCP server
 mcp = FastMCP(
     "world-bank-server",
@@ -44,59 +91,377 @@ mcp = FastMCP(
 # PRIVATE HELPER FUNCTIONS
 # =============================================================================
 
-def _load_data() -> pl.DataFrame:
-    """Load the World Bank indicators CSV file."""
-    if not DATA_FILE.exists():
-        raise FileNotFoundError(f"Data file not found: {DATA_FILE}")
-    return pl.read_csv(DATA_FILE)
+def _data_version() -> int:
+    """Return the source CSV's mtime, used as the cache key for derived data."""
+    for path in (CSV_FILE, DATA_FILE):
+        if path.exists():
+            return path.stat().st_mtime_ns
+    raise FileNotFoundError(f"Data file not found: {CSV_FILE}")
+
+
+def _ensure_parquet() -> bool:
+    """Convert the CSV to Parquet if it is missing or older than the CSV."""
+    if DATA_FILE.exists() and (
+        not CSV_FILE.exists() or DATA_FILE.stat().st_mtime_ns >= CSV_FILE.stat().st_mtime_ns
+    ):
+        return True
+    if not CSV_FILE.exists():
+        return False
+    try:
+        tmp_file = DATA_FILE.with_suffix(".parquet.tmp")
+        pl.scan_csv(CSV_FILE).sink_parquet(tmp_file)
+        tmp_file.replace(DATA_FILE)
+        logger.info("Converted %s to %s", CSV_FILE.name, DATA_FILE.name)
+        return True
+    except Exception as e:
+        logger.warning("Parquet conversion failed, falling back to CSV: %s", e)
+        return False
+
+
+def _load_data() -> pl.LazyFrame:
+    """Lazily scan the World Bank indicators data, preferring Parquet over CSV."""
+    if _ensure_parquet():
+        return pl.scan_parquet(DATA_FILE)
+    if not CSV_FILE.exists():
+        raise FileNotFoundError(f"Data file not found: {CSV_FILE}")
+    return pl.scan_csv(CSV_FILE)
+
+
+def _error_json(message: str) -> str:
+    """Serialize an error message for a resource response."""
+    return orjson.dumps({"error": message}).decode()
+
+
+def _build_schema_json() -> str:
+    """Build the schema JSON from Parquet metadata or the CSV header, without reading rows."""
+    try:
+        schema = _load_data().collect_schema()
+    except FileNotFoundError as e:
+        logger.error("Data file missing: %s", e)
+        return _error_json(str(e))
+    except Exception as e:
+        logger.error("Unexpected error loading schema: %s", e)
+        return _error_json(f"Failed to load schema: {str(e)}")
+    schema_info = {name: str(dtype) for name, dtype in schema.items()}
+    return orjson.dumps(schema_info, option=orjson.OPT_INDENT_2).decode()
 
 
-def _fetch_rest_countries(country_code: str) -> dict:
-    """Fetch country info from REST Countries API."""
+# The column layout is fixed for the life of the process, so serialize it once
+_SCHEMA_JSON: str = _build_schema_json()
+
+
+@functools.lru_cache(maxsize=1)
+def _countries_json(version: int) -> str:
+    """Build the unique-countries JSON once per data file version."""
+    return (
+        _load_data()
+        .select(["countryiso3code", "country"])
+        .unique()
+        .collect(engine="streaming")
+        .write_json()
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _indicators_index(version: int) -> dict[str, str]:
+    """Build the per-country indicators NDJSON once per data file version."""
+    df = _load_data().select(["countryiso3code", *INDICATOR_COLUMNS]).collect(engine="streaming")
+    partitions = df.partition_by("countryiso3code", as_dict=True, include_key=False)
+    return {key[0]: group.write_ndjson() for key, group in partitions.items()}
+
+
+def _normalize(country_code: str) -> Optional[str]:
+    """
+    Uppercase and validate a country code before any lookup or API call.
+
+    Returns None for codes that are not two or three letters. Membership is
+    left to the data source: the live APIs accept codes (e.g. income groups
+    such as HIC) that the local snapshot does not contain.
+    """
+    code = country_code.strip().upper()
+    return code if _CODE_RE.match(code) else None
+
+
+def _warm_caches() -> None:
+    """Build the local data caches up front so the first requests are fast."""
+    _ensure_parquet()
+    version = _data_version()
+    _countries_json(version)
+    _indicators_index(version)
+
+
+class _HostLimiter:
+    """Token bucket for one upstream host, pausable from rate-limit headers."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request to this host is allowed."""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Hold all requests to this host for the given number of seconds."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+_LIMITERS: dict[str, _HostLimiter] = {}
+
+
+def _limiter_for(host: str) -> _HostLimiter:
+    """Return the rate limiter for a host, creating it on first use."""
+    if host not in _LIMITERS:
+        _LIMITERS[host] = _HostLimiter(HOST_RATE_PER_SECOND, HOST_RATE_BURST)
+    return _LIMITERS[host]
+
+
+def _rate_limit_delay(response: httpx.Response) -> Optional[float]:
+    """Read how long the server asked us to wait, from Retry-After or X-RateLimit-*."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                return None
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        try:
+            reset = float(response.headers.get("X-RateLimit-Reset", ""))
+        except ValueError:
+            return None
+        # Reset is either an epoch timestamp or a number of seconds
+        return max(0.0, reset - time.time()) if reset > 1e9 else reset
+    return None
+
+
+async def _http_get_with_retry(url: str, params: Optional[dict] = None) -> httpx.Response:
+    """
+    GET a URL through the shared client with per-host rate limiting.
+
+    Timeouts, transport errors and retryable status codes (429/5xx) are
+    retried with capped exponential backoff plus jitter, honouring any delay
+    the server asks for. Each attempt's timeout is clamped to what is left of
+    HTTP_RETRY_BUDGET, and no retry starts once the budget would be exceeded;
+    the last response or error is then returned or raised.
+    """
+    limiter = _limiter_for(httpx.URL(url).host)
+    deadline = time.monotonic() + HTTP_RETRY_BUDGET
+    for attempt in range(HTTP_MAX_ATTEMPTS):
+        is_last = attempt == HTTP_MAX_ATTEMPTS - 1
+        delay = min(2**attempt, HTTP_BACKOFF_CAP) + random.random()
+        await limiter.acquire()
+        remaining = deadline - time.monotonic()
+        try:
+            response = await CLIENT.get(
+                url, params=params, timeout=min(HTTP_TIMEOUT, max(remaining, 1.0))
+            )
+        except httpx.TransportError as e:
+            # Errors a retry cannot fix (bad scheme, redirects, decoding) propagate as-is
+            if is_last or isinstance(e, httpx.UnsupportedProtocol):
+                raise
+            if time.monotonic() + delay > deadline:
+                logger.warning("Retry budget exhausted for %s", url)
+                raise
+            logger.warning("Request to %s failed (%r), retrying in %.1fs", url, e, delay)
+        else:
+            server_delay = _rate_limit_delay(response)
+            if server_delay is not None:
+                limiter.pause(min(server_delay, HTTP_BACKOFF_CAP))
+                delay = min(server_delay, HTTP_BACKOFF_CAP)
+            if response.status_code not in HTTP_RETRY_STATUSES or is_last:
+                return response
+            if time.monotonic() + delay > deadline:
+                logger.warning("Retry budget exhausted for %s", url)
+                return response
+            logger.warning(
+                "Request to %s returned %s, retrying in %.1fs", url, response.status_code, delay
+            )
+        await asyncio.sleep(delay)
+    raise RuntimeError("unreachable: retry loop always returns or raises")
+
+
+def _start_fetch(key: tuple, fetch: Callable[[], Awaitable[T]]) -> asyncio.Task[T]:
+    """Run a fetch for a cache key, storing the result and evicting LRU entries."""
+
+    async def _run() -> T:
+        try:
+            value = await fetch()
+            _CACHE[key] = (time.monotonic(), value)
+            _CACHE.move_to_end(key)
+            while len(_CACHE) > CACHE_MAX_ENTRIES:
+                _CACHE.popitem(last=False)
+            return value
+        finally:
+            _INFLIGHT.pop(key, None)
+
+    task = asyncio.create_task(_run())
+    # Always retrieve the outcome: background refreshes and fetches whose
+    # shielded callers were cancelled have nobody else awaiting them
+    task.add_done_callback(functools.partial(_log_fetch_failure, key))
+    _INFLIGHT[key] = task
+    return task
+
+
+def _log_fetch_failure(key: tuple, task: asyncio.Task) -> None:
+    """Log a failed cache fetch; any stale value keeps being served."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Cache fetch for %s failed: %s", key, task.exception())
+
+
+async def _cached(key: tuple, fetch: Callable[[], Awaitable[T]]) -> T:
+    """
+    Return a cached API response, fetching it on a miss.
+
+    Fresh entries are returned as-is. Entries past their TTL but within the
+    stale window are returned immediately while a background refresh runs.
+    Concurrent misses for the same key share one in-flight fetch.
+    """
+    entry = _CACHE.get(key)
+    if entry is not None:
+        stored_at, value = entry
+        age = time.monotonic() - stored_at
+        if age < CACHE_TTL_SECONDS:
+            _CACHE.move_to_end(key)
+            return cast(T, value)
+        if age < CACHE_TTL_SECONDS + CACHE_STALE_SECONDS:
+            if key not in _INFLIGHT:
+                _start_fetch(key, fetch)
+            return cast(T, value)
+
+    task: Optional[asyncio.Task[T]] = _INFLIGHT.get(key)
+    if task is None:
+        task = _start_fetch(key, fetch)
+    return await asyncio.shield(task)
+
+
+async def _fetch_rest_countries(country_code: str) -> dict:
+    """Fetch country info from REST Countries API (cached)."""
+    return await _cached(
+        ("restcountries", country_code.upper()),
+        functools.partial(_request_rest_countries, country_code),
+    )
+
+
+async def _request_rest_countries(country_code: str) -> dict:
+    """Request country info from REST Countries API."""
     url = f"https://restcountries.com/v3.1/alpha/{country_code}"
-    with httpx.Client(timeout=30.0) as client:
-        response = client.get(url)
-        response.raise_for_status()
-        return response.json()[0]
+    response = await _http_get_with_retry(url)
+    response.raise_for_status()
+    return orjson.loads(response.content)[0]
 
 
-def _fetch_world_bank_indicator(
+async def _fetch_world_bank_indicator(
     country_code: str,
     indicator: str,
     year: Optional[int] = None,
 ) -> list:
     """Fetch indicator from World Bank API."""
-    url = f"https://api.worldbank.org/v2/country/{country_code}/indicator/{indicator}"
-    params = {"format": "json", "per_page": 100}
-    if year:
+    return await _fetch_world_bank_indicator_multi([country_code], indicator, year)
+
+
+async def _fetch_world_bank_indicator_multi(
+    country_codes: list[str],
+    indicator: str,
+    year: Optional[int] = None,
+) -> list:
+    """Fetch indicator for several countries in one World Bank API request (cached)."""
+    return await _cached(
+        ("worldbank", tuple(code.upper() for code in country_codes), indicator, year),
+        functools.partial(_request_world_bank_indicator, country_codes, indicator, year),
+    )
+
+
+async def _request_world_bank_indicator(
+    country_codes: list[str],
+    indicator: str,
+    year: Optional[int] = None,
+) -> list:
+    """Request indicator for one or more countries from World Bank API."""
+    joined = ";".join(country_codes)
+    url = f"https://api.worldbank.org/v2/country/{joined}/indicator/{indicator}"
+    params = {"format": "json", "per_page": max(100, len(country_codes))}
+    if year is not None:
+        # The date filter returns at most one record per country
         params["date"] = str(year)
+        params["per_page"] = len(country_codes)
+
+    response = await _http_get_with_retry(url, params=params)
+    response.raise_for_status()
+    data = orjson.loads(response.content)
+    if len(data) < 2 or not data[1]:
+        return []
+    return data[1]
+
 
-    with httpx.Client(timeout=30.0) as client:
-        response = client.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-        if len(data) < 2 or not data[1]:
-            return []
-        return data[1]
+def _format_indicator_record(
+    country_code: str,
+    indicator: str,
+    year: int,
+    record: dict,
+) -> dict:
+    """Shape a World Bank API record into the tool response format."""
+    return {
+        "country": country_code,
+        "country_name": record.get("country", {}).get("value", "N/A"),
+        "indicator": indicator,
+        "indicator_name": record.get("indicator", {}).get("value", "N/A"),
+        "year": year,
+        "value": record.get("value"),
+    }
+
+
+def _create_app() -> Starlette:
+    """Build the Streamable HTTP app, closing the shared HTTP client on shutdown."""
+    app = mcp.streamable_http_app()
+    session_lifespan = app.router.lifespan_context
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        async with session_lifespan(app):
+            try:
+                yield
+            finally:
+                await CLIENT.aclose()
+
+    app.router.lifespan_context = lifespan
+    return app
 
 
 # =============================================================================
 # PART 1: RESOURCES (Local Data)
 # =============================================================================
+# Resources return prebuilt str payloads: FastMCP sends str as-is in a text
+# content block, while bytes would be base64-encoded into a binary blob.
 
-@mcp.resource("data://schema")
+@mcp.resource("data://schema", mime_type="application/json")
 def get_schema() -> str:
     """
     Return the schema of the World Bank dataset.
 
     This resource is provided as an example - it's already implemented.
     """
-    df = _load_data()
-    schema_info = {col: str(dtype) for col, dtype in zip(df.columns, df.dtypes)}
-    return json.dumps(schema_info, indent=2)
+    return _SCHEMA_JSON
 
 
-@mcp.resource("data://countries")
+@mcp.resource("data://countries", mime_type="application/json")
 def get_countries() -> str:
     """
     List all unique countries in the dataset.
@@ -106,18 +471,16 @@ def get_countries() -> str:
         Format: [{"countryiso3code": "USA", "country": "United States"}, ...]
     """
     try:
-        df = _load_data()
-        result = df.select(["countryiso3code", "country"]).unique()
-        return result.write_json()
+        return _countries_json(_data_version())
     except FileNotFoundError as e:
-        logger.error(f"Data file missing: {e}")
-        return json.dumps({"error": str(e)})
+        logger.error("Data file missing: %s", e)
+        return _error_json(str(e))
     except Exception as e:
-        logger.error(f"Unexpected error loading countries: {e}")
-        return json.dumps({"error": f"Failed to load countries: {str(e)}"})
+        logger.error("Unexpected error loading countries: %s", e)
+        return _error_json(f"Failed to load countries: {str(e)}")
 
 
-@mcp.resource("data://indicators/{country_code}")
+@mcp.resource("data://indicators/{country_code}", mime_type="application/x-ndjson")
 def get_country_indicators(country_code: str) -> str:
     """
     Get all indicators for a specific country from local data.
@@ -126,22 +489,26 @@ def get_country_indicators(country_code: str) -> str:
         country_code: ISO 3166-1 alpha-3 country code (e.g., "USA", "CHN", "DEU")
 
     Returns:
-        JSON string of all indicator records for the given country.
+        NDJSON string with one indicator record per line for the given country.
+        Format: {"indicator_id": "...", "indicator_name": "...", "year": 2022, "value": 1.0}
         Returns an error JSON object if the country code is not found.
     """
     try:
-        df = _load_data()
-        filtered = df.filter(pl.col("countryiso3code") == country_code.upper())
-        if filtered.is_empty():
-            logger.warning(f"Country code not found in local data: {country_code}")
-            return json.dumps({"error": f"Country code '{country_code}' not found in local dataset"})
-        return filtered.write_json()
+        code = _normalize(country_code)
+        if code is None:
+            logger.warning("Invalid country code: %s", country_code)
+            return _error_json(f"Invalid country code '{country_code}'")
+        records = _indicators_index(_data_version()).get(code)
+        if records is None:
+            logger.warning("Country code not found in local data: %s", country_code)
+            return _error_json(f"Country code '{country_code}' not found in local dataset")
+        return records
     except FileNotFoundError as e:
-        logger.error(f"Data file missing: {e}")
-        return json.dumps({"error": str(e)})
+        logger.error("Data file missing: %s", e)
+        return _error_json(str(e))
     except Exception as e:
-        logger.error(f"Unexpected error fetching indicators for {country_code}: {e}")
-        return json.dumps({"error": f"Failed to fetch indicators: {str(e)}"})
+        logger.error("Unexpected error fetching indicators for %s: %s", country_code, e)
+        return _error_json(f"Failed to fetch indicators: {str(e)}")
 
 
 # =============================================================================
@@ -149,7 +516,7 @@ def get_country_indicators(country_code: str) -> str:
 # =============================================================================
 
 @mcp.tool()
-def get_country_info(country_code: str) -> dict:
+async def get_country_info(country_code: str) -> dict:
     """
     Fetch detailed information about a country from REST Countries API.
 
@@ -160,9 +527,13 @@ def get_country_info(country_code: str) -> dict:
         Dictionary with country information including name, capital, region,
         subregion, languages, currencies, population, and flag emoji.
     """
-    logger.info(f"Fetching country info for: {country_code}")
+    logger.info("Fetching country info for: %s", country_code)
     try:
-        data = _fetch_rest_countries(country_code)
+        code = _normalize(country_code)
+        if code is None:
+            logger.warning("Invalid country code: %s", country_code)
+            return {"error": f"Invalid country code '{country_code}'"}
+        data = await _fetch_rest_countries(code)
         return {
             "name": data["name"]["common"],
             "capital": data.get("capital", ["N/A"])[0],
@@ -175,23 +546,23 @@ def get_country_info(country_code: str) -> dict:
         }
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 404:
-            logger.warning(f"Country not found: {country_code}")
+            logger.warning("Country not found: %s", country_code)
             return {"error": f"Country code '{country_code}' not found"}
-        logger.error(f"API HTTP error for {country_code}: {e}")
+        logger.error("API HTTP error for %s: %s", country_code, e)
         return {"error": f"API error ({e.response.status_code}): {str(e)}"}
     except httpx.TimeoutException:
-        logger.error(f"Request timed out for country: {country_code}")
+        logger.error("Request timed out for country: %s", country_code)
         return {"error": "Request timed out, please try again"}
     except httpx.RequestError as e:
-        logger.error(f"Network error fetching country info for {country_code}: {e}")
+        logger.error("Network error fetching country info for %s: %s", country_code, e)
         return {"error": f"Network error: {str(e)}"}
     except Exception as e:
-        logger.error(f"Unexpected error fetching country info for {country_code}: {e}")
+        logger.error("Unexpected error fetching country info for %s: %s", country_code, e)
         return {"error": f"Unexpected error: {str(e)}"}
 
 
 @mcp.tool()
-def get_live_indicator(
+async def get_live_indicator(
     country_code: str,
     indicator: str,
     year: int = 2022,
@@ -213,44 +584,43 @@ def get_live_indicator(
         - SP.DYN.LE00.IN: Life expectancy at birth
         - SE.ADT.LITR.ZS: Adult literacy rate
     """
-    logger.info(f"Fetching {indicator} for {country_code} in {year}")
+    logger.info("Fetching %s for %s in %s", indicator, country_code, year)
     try:
-        records = _fetch_world_bank_indicator(country_code, indicator, year)
+        code = _normalize(country_code)
+        if code is None:
+            logger.warning("Invalid country code: %s", country_code)
+            return {"error": f"Invalid country code '{country_code}'"}
+        country_code = code
+        records = await _fetch_world_bank_indicator(country_code, indicator, year)
         if not records:
-            logger.warning(f"No records returned for {country_code} / {indicator} / {year}")
+            logger.warning("No records returned for %s / %s / %s", country_code, indicator, year)
             return {"error": f"No data available for {country_code} / {indicator} in {year}"}
-        # 找到匹配年份的记录
-        for record in records:
-            if record.get("date") == str(year):
-                return {
-                    "country": country_code,
-                    "country_name": record.get("country", {}).get("value", "N/A"),
-                    "indicator": indicator,
-                    "indicator_name": record.get("indicator", {}).get("value", "N/A"),
-                    "year": year,
-                    "value": record.get("value"),
-                }
-        logger.warning(f"Year {year} not found in results for {country_code} / {indicator}")
-        return {"error": f"No data found for {country_code} / {indicator} in {year}"}
+        # The request is filtered by year, so only the first record can match
+        if records[0].get("date") != str(year):
+            logger.warning(
+                "Year %s not found in results for %s / %s", year, country_code, indicator
+            )
+            return {"error": f"No data found for {country_code} / {indicator} in {year}"}
+        return _format_indicator_record(country_code, indicator, year, records[0])
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 404:
-            logger.warning(f"Indicator or country not found: {country_code} / {indicator}")
+            logger.warning("Indicator or country not found: %s / %s", country_code, indicator)
             return {"error": f"Country '{country_code}' or indicator '{indicator}' not found"}
-        logger.error(f"API HTTP error for {country_code} / {indicator}: {e}")
+        logger.error("API HTTP error for %s / %s: %s", country_code, indicator, e)
         return {"error": f"API error ({e.response.status_code}): {str(e)}"}
     except httpx.TimeoutException:
-        logger.error(f"Request timed out for {country_code} / {indicator}")
+        logger.error("Request timed out for %s / %s", country_code, indicator)
         return {"error": "Request timed out, please try again"}
     except httpx.RequestError as e:
-        logger.error(f"Network error fetching indicator {indicator} for {country_code}: {e}")
+        logger.error("Network error fetching indicator %s for %s: %s", indicator, country_code, e)
         return {"error": f"Network error: {str(e)}"}
     except Exception as e:
-        logger.error(f"Unexpected error fetching {indicator} for {country_code}: {e}")
+        logger.error("Unexpected error fetching %s for %s: %s", indicator, country_code, e)
         return {"error": f"Unexpected error: {str(e)}"}
 
 
 @mcp.tool()
-def compare_countries(
+async def compare_countries(
     country_codes: list[str],
     indicator: str,
     year: int = 2022,
@@ -267,26 +637,90 @@ def compare_countries(
         List of dictionaries, one per country, each containing country, country_name,
         indicator, year, and value. Individual failures don't abort the whole request.
     """
-    logger.info(f"Comparing {indicator} for countries: {country_codes}")
+    logger.info("Comparing %s for countries: %s", indicator, country_codes)
 
     if not country_codes:
         logger.warning("compare_countries called with empty country list")
         return [{"error": "No country codes provided"}]
 
-    results = []
-    for code in country_codes:
+    normalized = [_normalize(code) for code in country_codes]
+    valid_codes = list(dict.fromkeys(code for code in normalized if code))
+
+    # One batched request for all countries; codes can be alpha-3 or alpha-2
+    by_code: dict[str, dict] = {}
+    batch_error: Optional[str] = None
+    if valid_codes:
         try:
-            result = get_live_indicator(code, indicator, year)
-            results.append(result)
+            records = await _fetch_world_bank_indicator_multi(valid_codes, indicator, year)
+            for record in records:
+                if record.get("date") != str(year):
+                    continue
+                for key in (record.get("countryiso3code"), record.get("country", {}).get("id")):
+                    if key:
+                        by_code[key.upper()] = record
+        except httpx.HTTPStatusError as e:
+            # A 4xx means the batch itself was rejected, so per-country calls can
+            # pinpoint the bad code; a 5xx/429 survived retries and would fail again
+            if e.response.status_code in HTTP_RETRY_STATUSES:
+                batch_error = f"API error ({e.response.status_code}): {str(e)}"
+            else:
+                logger.warning(
+                    "Batched fetch rejected for %s, falling back per country: %s", valid_codes, e
+                )
+        except httpx.TimeoutException:
+            batch_error = "Request timed out, please try again"
+        except httpx.RequestError as e:
+            batch_error = f"Network error: {str(e)}"
         except Exception as e:
-            logger.error(f"Failed to fetch {indicator} for {code}: {e}")
+            batch_error = f"Unexpected error: {str(e)}"
+
+    if batch_error is not None:
+        logger.error("Batched fetch failed for %s: %s", valid_codes, batch_error)
+
+    # Countries absent from a successful or rejected batch are retried individually
+    # for a precise error; after an upstream failure they share the batch error
+    missing = [] if batch_error else [code for code in valid_codes if code not in by_code]
+    semaphore = asyncio.Semaphore(COMPARE_CONCURRENCY)
+
+    async def _bounded(code: str) -> dict:
+        async with semaphore:
+            # FastMCP's decorator hides the signature, so mypy sees Any here
+            return cast(dict, await get_live_indicator(code, indicator, year))
+
+    tasks = [asyncio.create_task(_bounded(code)) for code in missing]
+    outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+
+    fallback: dict[str, dict] = {}
+    for missing_code, outcome in zip(missing, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error("Failed to fetch %s for %s: %s", indicator, missing_code, outcome)
+            fallback[missing_code] = {
+                "country": missing_code,
+                "indicator": indicator,
+                "year": year,
+                "value": None,
+                "error": str(outcome),
+            }
+        else:
+            fallback[missing_code] = outcome
+
+    results: list[dict] = []
+    for raw_code, code in zip(country_codes, normalized):
+        if code is None:
+            logger.warning("Invalid country code: %s", raw_code)
+            results.append({"error": f"Invalid country code '{raw_code}'"})
+        elif code in by_code:
+            results.append(_format_indicator_record(code, indicator, year, by_code[code]))
+        elif batch_error is not None:
             results.append({
                 "country": code,
                 "indicator": indicator,
                 "year": year,
                 "value": None,
-                "error": str(e),
+                "error": batch_error,
             })
+        else:
+            results.append(fallback[code])
     return results
 
 
@@ -295,7 +729,13 @@ def compare_countries(
 # =============================================================================
 
 if __name__ == "__main__":
-    logger.info(f"Starting World Bank MCP Server on http://{HOST}:{PORT}/mcp")
-    logger.info(f"Connect with MCP Inspector or test client at http://{HOST}:{PORT}/mcp")
+    _warm_caches()
+    logger.info("Starting World Bank MCP Server on http://%s:%s/mcp", HOST, PORT)
+    logger.info("Connect with MCP Inspector or test client at http://%s:%s/mcp", HOST, PORT)
     logger.info("Press Ctrl+C to stop")
-    mcp.run(transport="streamable-http")
\ No newline at end of file
+    uvicorn.run(
+        _create_app(),
+        host=HOST,
+        port=PORT,
+        log_level=mcp.settings.log_level.lower(),
+    )
\ No newline at end of file
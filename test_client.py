@@ -36,6 +36,14 @@ def _print_separator(title: str) -> None:
     logger.info("=" * 60)
 
 
+def _raise_if_error(data: object) -> None:
+    """Fail the test when the server answered with an error payload."""
+    items = data if isinstance(data, list) else [data]
+    errors = [item["error"] for item in items if isinstance(item, dict) and "error" in item]
+    if errors:
+        raise ValueError(f"Server returned error(s): {errors}")
+
+
 def _truncate(text: str, max_length: int = 200) -> str:
     """Truncate text for display."""
     if len(text) > max_length:
@@ -79,7 +87,7 @@ async def test_server() -> bool:
                     schema_text = schema.contents[0].text
                     logger.info(f"  Result: {_truncate(schema_text)}")
                     # Verify it's valid JSON
-                    json.loads(schema_text)
+                    _raise_if_error(json.loads(schema_text))
                     logger.info("  Status: PASS")
                 except Exception as e:
                     logger.error(f"  Status: FAIL - {e}")
@@ -111,9 +119,10 @@ async def test_server() -> bool:
                     if indicators_text is None or indicators_text == "null":
                         raise ValueError("Resource returned None - not implemented")
                     logger.info(f"  Result: {_truncate(indicators_text)}")
-                    # Verify it's valid JSON
-                    data = json.loads(indicators_text)
-                    logger.info(f"  Found {len(data) if isinstance(data, list) else 1} records")
+                    # Verify it's valid NDJSON (one JSON record per line)
+                    data = [json.loads(line) for line in indicators_text.splitlines() if line]
+                    _raise_if_error(data)
+                    logger.info(f"  Found {len(data)} records")
                     logger.info("  Status: PASS")
                 except Exception as e:
                     logger.error(f"  Status: FAIL - {e}")
@@ -142,6 +151,7 @@ async def test_server() -> bool:
                     logger.info(f"  Result: {_truncate(result_text, 300)}")
                     # Verify it contains expected fields
                     data = json.loads(result_text) if isinstance(result_text, str) else result_text
+                    _raise_if_error(data)
                     if "capital" not in str(data).lower():
                         logger.warning("  Warning: Response may be missing expected fields")
                     logger.info("  Status: PASS")
@@ -164,6 +174,7 @@ async def test_server() -> bool:
                     if result_text is None or result_text == "null":
                         raise ValueError("Tool returned None - not implemented")
                     logger.info(f"  Result: {result_text}")
+                    _raise_if_error(json.loads(result_text))
                     logger.info("  Status: PASS")
                 except Exception as e:
                     logger.error(f"  Status: FAIL - {e}")
@@ -186,6 +197,7 @@ async def test_server() -> bool:
                     logger.info(f"  Result: {_truncate(result_text, 400)}")
                     # Verify it's a list with 3 entries
                     data = json.loads(result_text) if isinstance(result_text, str) else result_text
+                    _raise_if_error(data)
                     if isinstance(data, list) and len(data) == 3:
                         logger.info("  Found results for all 3 countries")
                     logger.info("  Status: PASS")